@@ -2,7 +2,8 @@
 
 Provides:
 - POST /upload: Upload PDF or DOCX documents for processing
-- GET /: List user's documents
+- GET /: List user's documents (optional ?filename_contains= filter)
+- GET /status?ids=...: Get processing status for several documents at once
 - GET /{document_id}/status: Get document processing status
 
 Following research Pattern 6: Document Upload with Async Processing.
@@ -12,7 +13,7 @@ Supports both authenticated and anonymous users via get_current_user_optional.
 import os
 import tempfile
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 
 from fastapi import (
     APIRouter,
@@ -20,6 +21,7 @@ from fastapi import (
     Depends,
     File,
     HTTPException,
+    Query,
     UploadFile,
     status,
 )
@@ -46,6 +48,9 @@ ALLOWED_CONTENT_TYPES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
 
+# Maximum document IDs per batch status request (each may hit Neo4j)
+MAX_STATUS_BATCH_IDS = 100
+
 
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
@@ -126,54 +131,49 @@ async def upload_document(
 
 @router.get("/", response_model=List[DocumentInfo])
 async def list_documents(
+    filename_contains: Optional[str] = Query(
+        default=None, description="Only return documents whose filename contains this"
+    ),
     current_user: UserContext = Depends(get_current_user_optional),
 ) -> List[DocumentInfo]:
     """List all documents for the current user.
 
     Works for both authenticated and anonymous users.
+    Optional filename filter is applied in the database query.
 
     Args:
+        filename_contains: Optional filename substring filter.
         current_user: UserContext (authenticated or anonymous).
 
     Returns:
         List of DocumentInfo for user's documents.
     """
     user_id = current_user.id  # Works for both authenticated and anonymous
-    documents = get_user_documents(user_id)
+    documents = get_user_documents(user_id, filename_contains=filename_contains)
     return [DocumentInfo(**doc) for doc in documents]
 
 
-@router.get("/{document_id}/status", response_model=TaskStatusResponse)
-async def get_document_status(
-    document_id: str,
-    current_user: UserContext = Depends(get_current_user_optional),
-) -> TaskStatusResponse:
-    """Get document processing status.
+def _resolve_document_status(
+    document_id: str, user_id: str
+) -> Optional[TaskStatusResponse]:
+    """Resolve processing status for a single document owned by user_id.
 
-    Returns current processing stage and progress percentage.
-    If document is fully processed and not in task tracker,
-    returns completed status.
+    Checks the task tracker first (in-progress documents), then Neo4j
+    (already processed documents).
 
     Args:
         document_id: UUID of the document.
-        current_user: UserContext (authenticated or anonymous).
+        user_id: ID of the requesting user.
 
     Returns:
-        TaskStatusResponse with status, progress, and message.
-
-    Raises:
-        HTTPException 404: If document not found.
+        TaskStatusResponse, or None if not found or not owned by user.
     """
-    user_id = current_user.id
-
     # Check task tracker first (for in-progress documents)
     task = task_tracker.get(document_id)
     if task:
         # Verify ownership
         if task.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
-            )
+            return None
         return TaskStatusResponse(
             document_id=document_id,
             status=task.status.value,
@@ -192,6 +192,75 @@ async def get_document_status(
             message="Document ready",
         )
 
+    return None
+
+
+@router.get("/status", response_model=Dict[str, TaskStatusResponse])
+async def get_document_statuses(
+    ids: str = Query(..., description="Comma-separated document IDs"),
+    current_user: UserContext = Depends(get_current_user_optional),
+) -> Dict[str, TaskStatusResponse]:
+    """Get processing status for several documents in one round trip.
+
+    Lets clients polling multiple uploads avoid one request per document.
+    Documents that are not found or not owned by the user are omitted
+    from the result rather than failing the whole batch.
+
+    Args:
+        ids: Comma-separated document UUIDs.
+        current_user: UserContext (authenticated or anonymous).
+
+    Returns:
+        Dict mapping document_id to TaskStatusResponse.
+
+    Raises:
+        HTTPException 422: If more than MAX_STATUS_BATCH_IDS ids are given.
+    """
+    document_ids = [
+        document_id
+        for document_id in dict.fromkeys(i.strip() for i in ids.split(","))
+        if document_id
+    ]
+    if len(document_ids) > MAX_STATUS_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Too many document IDs: {len(document_ids)}. Maximum is {MAX_STATUS_BATCH_IDS}.",
+        )
+
+    user_id = current_user.id
+    statuses = {}
+    for document_id in document_ids:
+        doc_status = _resolve_document_status(document_id, user_id)
+        if doc_status:
+            statuses[document_id] = doc_status
+    return statuses
+
+
+@router.get("/{document_id}/status", response_model=TaskStatusResponse)
+async def get_document_status(
+    document_id: str,
+    current_user: UserContext = Depends(get_current_user_optional),
+) -> TaskStatusResponse:
+    """Get document processing status.
+
+    Returns current processing stage and progress percentage.
+    If document is fully processed and not in task tracker,
+    returns completed status.
+
+    Args:
+        document_id: UUID of the document.
+        current_user: UserContext (authenticated or anonymous).
+
+    Returns:
+        TaskStatusResponse with status, progress, and message.
+
+    Raises:
+        HTTPException 404: If document not found.
+    """
+    doc_status = _resolve_document_status(document_id, current_user.id)
+    if doc_status:
+        return doc_status
+
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
     )
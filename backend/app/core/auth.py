@@ -27,6 +27,24 @@ from app.config import settings
 # Initialize Argon2 password hasher (GPU-resistant, recommended)
 password_hash = PasswordHash((Argon2Hasher(),))
 
+# Allowed algorithms shared by all token decoders
+_ALLOWED_ALGORITHMS = [settings.ALGORITHM]  # Explicit list prevents "none" attack
+
+
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT with the configured secret and algorithm.
+
+    Args:
+        token: JWT token string to decode
+
+    Returns:
+        Decoded payload dict
+
+    Raises:
+        jwt.InvalidTokenError: If token is expired, tampered or malformed
+    """
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=_ALLOWED_ALGORITHMS)
+
 
 def hash_password(password: str) -> str:
     """Hash a password using Argon2.
@@ -94,11 +112,7 @@ def decode_access_token(token: str) -> Optional[dict]:
     algorithm confusion attacks (never accepts "none").
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],  # Explicit list prevents "none" attack
-        )
+        payload = _decode_token(token)
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -171,11 +185,7 @@ def decode_refresh_token(token: str) -> Optional[dict]:
         Decoded payload dict if valid and is refresh type, None otherwise.
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
+        payload = _decode_token(token)
         # Verify this is a refresh token
         if payload.get("type") != "refresh":
             return None
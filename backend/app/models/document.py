@@ -52,11 +52,15 @@ def get_document_by_id(document_id: str, user_id: str) -> Optional[Dict]:
         return None
 
 
-def get_user_documents(user_id: str) -> List[Dict]:
+def get_user_documents(
+    user_id: str, filename_contains: Optional[str] = None
+) -> List[Dict]:
     """Get all documents for a user.
 
     Args:
         user_id: ID of the user.
+        filename_contains: Optional substring filter on filename,
+            applied in the Cypher query rather than in Python.
 
     Returns:
         List of document dicts with id, filename, upload_date, chunk_count, summary.
@@ -65,6 +69,8 @@ def get_user_documents(user_id: str) -> List[Dict]:
         result = session.run(
             """
             MATCH (u:User {id: $user_id})-[:OWNS]->(d:Document)
+            WHERE $filename_contains IS NULL
+               OR d.filename CONTAINS $filename_contains
             RETURN d {
                 .id,
                 .filename,
@@ -77,6 +83,7 @@ def get_user_documents(user_id: str) -> List[Dict]:
             ORDER BY d.upload_date DESC
             """,
             user_id=user_id,
+            filename_contains=filename_contains,
         )
         documents = []
         for record in result:
@@ -14,6 +14,7 @@ import asyncio
 import uuid
 from typing import AsyncGenerator
 
+import jwt
 import pytest
 from httpx import ASGITransport, AsyncClient
 
@@ -41,13 +42,31 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
     Uses ASGITransport to test the FastAPI app directly without
     starting a real server. This is faster and more reliable
     for integration tests.
+
+    Requests are dispatched in-process, so there is no TCP/TLS
+    connection setup to amortize: http2/keepalive limits would be
+    ignored by ASGITransport and are intentionally not configured.
     """
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+async def session_client() -> AsyncGenerator[AsyncClient, None]:
+    """Create session-scoped async client for one-time user setup.
+
+    Used only by the session-scoped token fixtures so that test users
+    are registered (password hashed, tokens signed) once per run.
+    Tests themselves use the function-scoped ``client`` so cookies
+    never leak between tests.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture(scope="session")
 async def user_a_credentials() -> dict:
     """User A test credentials.
 
@@ -60,7 +79,7 @@ async def user_a_credentials() -> dict:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def user_b_credentials() -> dict:
     """User B test credentials.
 
@@ -73,14 +92,14 @@ async def user_b_credentials() -> dict:
     }
 
 
-@pytest.fixture
-async def user_a_token(client: AsyncClient, user_a_credentials: dict) -> str:
+@pytest.fixture(scope="session")
+async def user_a_token(session_client: AsyncClient, user_a_credentials: dict) -> str:
     """Register User A and return access token.
 
-    Creates a new user account and returns the JWT access token
-    for use in authenticated requests.
+    Creates a new user account once per test session and returns the
+    JWT access token for use in authenticated requests.
     """
-    response = await client.post(
+    response = await session_client.post(
         "/api/v1/auth/register",
         json=user_a_credentials,
     )
@@ -88,14 +107,14 @@ async def user_a_token(client: AsyncClient, user_a_credentials: dict) -> str:
     return response.json()["access_token"]
 
 
-@pytest.fixture
-async def user_b_token(client: AsyncClient, user_b_credentials: dict) -> str:
+@pytest.fixture(scope="session")
+async def user_b_token(session_client: AsyncClient, user_b_credentials: dict) -> str:
     """Register User B and return access token.
 
-    Creates a new user account and returns the JWT access token
-    for use in authenticated requests.
+    Creates a new user account once per test session and returns the
+    JWT access token for use in authenticated requests.
     """
-    response = await client.post(
+    response = await session_client.post(
         "/api/v1/auth/register",
         json=user_b_credentials,
     )
@@ -103,9 +122,22 @@ async def user_b_token(client: AsyncClient, user_b_credentials: dict) -> str:
     return response.json()["access_token"]
 
 
-@pytest.fixture
-async def admin_token(client: AsyncClient) -> str:
-    """Create admin user and return token.
+@pytest.fixture(scope="session")
+def tampered_token(user_a_token: str) -> str:
+    """Forge User A's access token with an injected user_id, once per session.
+
+    Keeps User A's real claims (sub, jti, exp) so the user lookup succeeds
+    and only signature verification can reject it. Re-signed with a key
+    the attacker controls (the real secret is unknown to them).
+    """
+    payload = jwt.decode(user_a_token, options={"verify_signature": False})
+    payload["user_id"] = "attacker_injected_id"
+    return jwt.encode(payload, "wrong_secret_key", algorithm="HS256")
+
+
+@pytest.fixture(scope="session")
+async def admin_token(session_client: AsyncClient) -> str:
+    """Create admin user once per test session and return token.
 
     Steps:
     1. Register a new user
@@ -118,7 +150,7 @@ async def admin_token(client: AsyncClient) -> str:
     }
 
     # Register admin
-    response = await client.post(
+    response = await session_client.post(
         "/api/v1/auth/register",
         json=admin_creds,
     )
@@ -135,7 +167,7 @@ async def admin_token(client: AsyncClient) -> str:
         )
 
     # Re-login to get token with admin role
-    response = await client.post(
+    response = await session_client.post(
         "/api/v1/auth/login",
         data={"username": admin_creds["email"], "password": admin_creds["password"]},
     )
@@ -14,14 +14,12 @@ Test Categories:
 5. Admin Access Control - RBAC is enforced
 """
 
-from io import BytesIO
-
-import jwt
 import pytest
 from httpx import AsyncClient
 
 # Minimal valid PDF content for testing
-# This is the smallest valid PDF that can be processed
+# This is the smallest valid PDF that can be processed.
+# Passed to httpx as raw bytes (no BytesIO wrapper per upload).
 TEST_PDF_CONTENT = b"""%PDF-1.4
 1 0 obj
 << /Type /Catalog /Pages 2 0 R >>
@@ -77,7 +75,7 @@ class TestDocumentIsolation:
         """
         # User A uploads a document with unique content
         files = {
-            "file": ("user_a_secret.pdf", BytesIO(TEST_PDF_CONTENT), "application/pdf")
+            "file": ("user_a_secret.pdf", TEST_PDF_CONTENT, "application/pdf")
         }
         response = await client.post(
             "/api/v1/documents/upload",
@@ -101,9 +99,9 @@ class TestDocumentIsolation:
 
         # Verify User B does not see User A's document in citations
         citations = response.json().get("citations", [])
-        citation_files = [c.get("filename", "") for c in citations]
+        citation_filenames = {c.get("filename", "") for c in citations}
 
-        assert "user_a_secret.pdf" not in citation_files, (
+        assert "user_a_secret.pdf" not in citation_filenames, (
             "ISOLATION FAILURE: User B saw User A's document in query results"
         )
 
@@ -121,7 +119,7 @@ class TestDocumentIsolation:
         files = {
             "file": (
                 "secret_doc_user_a.pdf",
-                BytesIO(TEST_PDF_CONTENT),
+                TEST_PDF_CONTENT,
                 "application/pdf",
             )
         }
@@ -131,23 +129,19 @@ class TestDocumentIsolation:
             files=files,
         )
 
-        # User B lists their documents
+        # User B lists their documents matching User A's filename
+        # (predicate is evaluated server-side alongside the user_id filter)
         response = await client.get(
-            "/api/v1/documents",
+            "/api/v1/documents/",
             headers=auth_headers_b,
+            params={"filename_contains": "secret_doc_user_a"},
         )
 
         if response.status_code == 200:
             documents = response.json()
-            # Handle both list and dict with 'documents' key
-            if isinstance(documents, dict):
-                documents = documents.get("documents", [])
-
-            for doc in documents:
-                filename = doc.get("filename", "")
-                assert "secret_doc_user_a" not in filename, (
-                    f"ISOLATION FAILURE: User B saw User A's document '{filename}' in list"
-                )
+            assert documents == [], (
+                f"ISOLATION FAILURE: User B saw User A's documents in list: {documents}"
+            )
 
     async def test_user_cannot_delete_other_users_documents(
         self,
@@ -164,7 +158,7 @@ class TestDocumentIsolation:
         files = {
             "file": (
                 "delete_test_user_a.pdf",
-                BytesIO(TEST_PDF_CONTENT),
+                TEST_PDF_CONTENT,
                 "application/pdf",
             )
         }
@@ -190,6 +184,53 @@ class TestDocumentIsolation:
                     f"for deletion (status: {response.status_code})"
                 )
 
+    async def test_user_cannot_see_other_users_document_status_in_batch(
+        self,
+        client: AsyncClient,
+        auth_headers_a: dict,
+        auth_headers_b: dict,
+    ):
+        """User B's batch status lookup must not reveal User A's documents.
+
+        Tests the multi-document status endpoint for tenant isolation.
+        """
+        files = {
+            "file": (
+                "status_test_user_a.pdf",
+                TEST_PDF_CONTENT,
+                "application/pdf",
+            )
+        }
+        response = await client.post(
+            "/api/v1/documents/upload",
+            headers=auth_headers_a,
+            files=files,
+        )
+
+        if response.status_code in [200, 201, 202]:
+            doc_id = response.json().get("document_id")
+
+            if doc_id:
+                # Owner sees the document in the batch result
+                response = await client.get(
+                    "/api/v1/documents/status",
+                    headers=auth_headers_a,
+                    params={"ids": doc_id},
+                )
+                assert response.status_code == 200
+                assert doc_id in response.json()
+
+                # Other user gets it silently omitted
+                response = await client.get(
+                    "/api/v1/documents/status",
+                    headers=auth_headers_b,
+                    params={"ids": doc_id},
+                )
+                assert response.status_code == 200
+                assert doc_id not in response.json(), (
+                    "ISOLATION FAILURE: User B saw User A's document status"
+                )
+
 
 @pytest.mark.asyncio
 class TestMemoryIsolation:
@@ -276,22 +317,13 @@ class TestTokenSecurity:
     async def test_tampered_token_rejected(
         self,
         client: AsyncClient,
-        user_a_token: str,
+        tampered_token: str,
     ):
         """CRITICAL: Modified tokens must be rejected.
 
-        Attempts to tamper with the user_id in the token payload
-        and sign with a wrong key. This should be rejected.
+        Uses User A's token with a tampered user_id, signed with a wrong
+        key (attacker doesn't know real secret). This should be rejected.
         """
-        # Decode token without verification to get payload
-        payload = jwt.decode(user_a_token, options={"verify_signature": False})
-
-        # Tamper with user_id
-        payload["user_id"] = "attacker_injected_id"
-
-        # Re-encode with wrong key (attacker doesn't know real secret)
-        tampered_token = jwt.encode(payload, "wrong_secret_key", algorithm="HS256")
-
         # Attempt to use tampered token
         response = await client.post(
             "/api/v1/query",
@@ -361,7 +393,7 @@ class TestAnonymousIsolation:
         files = {
             "file": (
                 "auth_user_only.pdf",
-                BytesIO(TEST_PDF_CONTENT),
+                TEST_PDF_CONTENT,
                 "application/pdf",
             )
         }
@@ -379,9 +411,9 @@ class TestAnonymousIsolation:
 
         if response.status_code == 200:
             citations = response.json().get("citations", [])
-            citation_files = [c.get("filename", "") for c in citations]
+            citation_filenames = {c.get("filename", "") for c in citations}
 
-            assert "auth_user_only" not in str(citation_files), (
+            assert not any("auth_user_only" in f for f in citation_filenames), (
                 "ISOLATION FAILURE: Anonymous user saw authenticated user's document"
             )
 
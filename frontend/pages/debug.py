@@ -5,9 +5,45 @@ Requires authentication to view - helps verify auth flows work correctly.
 """
 
 import streamlit as st
-import jwt
 from datetime import datetime, timezone
 
+from utils.session import decode_token_claims
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _token_summary(token: str) -> dict:
+    """Decode token claims and precompute display values once per token.
+
+    Only the live time-remaining countdown is left to compute per rerun.
+
+    Args:
+        token: JWT access token string.
+
+    Returns:
+        Dict with payload, user_id, role, exp_dt and iat_str.
+    """
+    # Decode access token without validation (just reading claims)
+    payload = decode_token_claims(token) or {}
+
+    exp_timestamp = payload.get("exp")
+    iat_timestamp = payload.get("iat")
+    return {
+        "payload": payload,
+        "user_id": payload.get("user_id", "N/A"),
+        "role": payload.get("role", "user"),
+        "exp_dt": (
+            datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
+            if exp_timestamp
+            else None
+        ),
+        "iat_str": (
+            datetime.fromtimestamp(iat_timestamp, tz=timezone.utc).strftime("%H:%M:%S")
+            if iat_timestamp
+            else None
+        ),
+    }
+
+
 st.title("Debug Panel")
 
 # Auth guard - require login to view debug info
@@ -17,25 +53,21 @@ if not st.session_state.get("is_authenticated"):
 
 st.subheader("JWT Token Info")
 
-# Decode access token without validation (just reading claims)
 access_token = st.session_state.get("access_token")
 if access_token:
-    payload = jwt.decode(
-        access_token,
-        options={"verify_signature": False}
-    )
+    summary = _token_summary(access_token)
+    payload = summary["payload"]
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.metric("User ID", payload.get("user_id", "N/A"))
-        st.metric("Role", payload.get("role", "user"))
+        st.metric("User ID", summary["user_id"])
+        st.metric("Role", summary["role"])
 
     with col2:
-        # Token expiry countdown
-        exp_timestamp = payload.get("exp")
-        if exp_timestamp:
-            exp_dt = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
+        # Token expiry countdown (only live value, not cached)
+        exp_dt = summary["exp_dt"]
+        if exp_dt:
             remaining = exp_dt - datetime.now(timezone.utc)
             if remaining.total_seconds() > 0:
                 mins = int(remaining.total_seconds() // 60)
@@ -47,10 +79,8 @@ if access_token:
             st.metric("Token Expires In", "N/A")
 
         # Issued at timestamp
-        iat_timestamp = payload.get("iat")
-        if iat_timestamp:
-            iat_dt = datetime.fromtimestamp(iat_timestamp, tz=timezone.utc)
-            st.metric("Issued At", iat_dt.strftime("%H:%M:%S"))
+        if summary["iat_str"]:
+            st.metric("Issued At", summary["iat_str"])
         else:
             st.metric("Issued At", "N/A")
 else:
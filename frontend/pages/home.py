@@ -1,24 +1,381 @@
 """Home page with document upload and chat.
 
 Available to all users (anonymous and authenticated).
-- Documents tab: upload PDF/DOCX, view/delete documents
+- Documents tab: upload PDF/DOCX, view/delete documents (single selectable table)
 - Chat tab: ask questions about uploaded documents with streaming responses
 """
 
-import json
+import functools
+import hashlib
+import re
 import time
+import uuid
+from typing import List, Optional, Tuple
 
+import orjson
+import pandas as pd
 import streamlit as st
 
 from utils.api_client import (
     delete_document,
-    get_document_status,
+    invalidate_document_cache,
     list_documents,
+    poll_statuses,
     query_documents,
     query_documents_stream,
     upload_document,
 )
 
+# Minimum seconds between streamed-answer repaints (~30 FPS). Tokens arriving
+# faster than this are buffered and shown on the next paint.
+PAINT_INTERVAL = 0.033
+
+# Seconds between processing status polls while uploads are pending
+UPLOAD_POLL_INTERVAL = 1
+
+# Most recent chat messages always shown; older ones behind a toggle
+VISIBLE_CHAT_HISTORY = 20
+
+# Longest chunk text shown per citation; longer text is cut with an ellipsis
+CITATION_PREVIEW_CHARS = 500
+
+# Citation block template, bound once rather than rebuilt per citation.
+# The code fence is sized per preview so chunk text is always shown verbatim.
+_format_citation = (
+    "**{filename}** (relevance: {score:.0%})\n\n{fence}\n{preview}\n{fence}"
+).format
+
+# Backtick runs in chunk text; a fence must be longer than any of them
+_BACKTICK_RUN = re.compile(r"`+")
+
+# Number of chunks retrieved per chat query
+QUERY_MAX_RESULTS = 3
+
+# Completed answers kept per session for replaying repeated questions
+QUERY_CACHE_SIZE = 64
+
+# Placeholder text shown for each backend processing stage
+_STATUS_MESSAGES = {
+    "retrieving": "_Searching documents..._",
+    "generating": "_Generating answer..._",
+}
+
+
+@functools.lru_cache(maxsize=16)
+def _status_message(data: str) -> Optional[str]:
+    """Map a raw status event payload to its placeholder text.
+
+    Status payloads are a small fixed set ({"stage": ...}), so each
+    distinct payload is JSON-parsed once and then served from cache.
+    """
+    return _STATUS_MESSAGES.get(orjson.loads(data).get("stage", ""))
+
+
+def _citation_preview(chunk_text: str) -> str:
+    """Cut long chunk text down to CITATION_PREVIEW_CHARS with an ellipsis."""
+    if len(chunk_text) > CITATION_PREVIEW_CHARS:
+        return chunk_text[:CITATION_PREVIEW_CHARS] + "…"
+    return chunk_text
+
+
+def _code_fence(text: str) -> str:
+    """Return a backtick fence longer than any backtick run in text.
+
+    A fixed ``` fence would be closed early by chunk text containing
+    three or more backticks, rendering the rest as live markdown.
+    """
+    longest = max((len(run) for run in _BACKTICK_RUN.findall(text)), default=0)
+    return "`" * max(3, longest + 1)
+
+
+def format_citations(citations: List[dict]) -> str:
+    """Format an answer's citations into one markdown string.
+
+    Called once when the answer arrives; the result is stored with the
+    message so reruns re-use it instead of re-formatting every citation.
+    """
+    blocks = []
+    for cit in citations:
+        preview = _citation_preview(cit.get("chunk_text", ""))
+        blocks.append(
+            _format_citation(
+                filename=cit["filename"],
+                score=cit.get("relevance_score", 0),
+                preview=preview,
+                fence=_code_fence(preview),
+            )
+        )
+    return "\n\n".join(blocks)
+
+
+def render_citations(sources_md: Optional[str], message_id: str) -> None:
+    """Render pre-formatted citations behind a per-message "Sources" toggle.
+
+    Unlike a collapsed expander (whose content is still sent to the
+    browser), the chunk text is only rendered once the toggle is on.
+    Shared by live answers and chat history; message_id keeps the toggle
+    state stable across reruns.
+    """
+    if not sources_md:
+        return
+    if st.toggle("Sources", key=f"sources_{message_id}"):
+        with st.container(border=True):
+            st.markdown(sources_md)
+
+
+def render_chat_message(msg: dict) -> None:
+    """Render one chat history message with its citations."""
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+        render_citations(msg.get("sources"), msg.get("id", ""))
+
+
+def _query_cache_key(prompt: str) -> bytes:
+    """Build the per-session answer cache key for a prompt.
+
+    Includes the current identity so logging in or out within the same
+    browser session never replays another identity's answers.
+    """
+    identity = (
+        st.session_state.get("access_token")
+        or st.session_state.get("anon_session_id")
+        or ""
+    )
+    return hashlib.blake2b(
+        f"{identity}|{QUERY_MAX_RESULTS}|{prompt}".encode(), digest_size=16
+    ).digest()
+
+
+def _get_cached_answer(cache_key: bytes) -> Optional[Tuple[str, str]]:
+    """Return a cached (answer, sources_md) pair, refreshing its LRU position."""
+    query_cache = st.session_state.query_cache
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        query_cache.move_to_end(cache_key)
+    return cached
+
+
+def _cache_answer(cache_key: bytes, answer: str, sources_md: str) -> None:
+    """Store a completed answer, evicting the least recently used ones."""
+    query_cache = st.session_state.query_cache
+    query_cache[cache_key] = (answer, sources_md)
+    query_cache.move_to_end(cache_key)
+    while len(query_cache) > QUERY_CACHE_SIZE:
+        query_cache.popitem(last=False)
+
+
+def _stream_answer(
+    prompt: str, response_placeholder
+) -> Tuple[str, List[dict], bool]:
+    """Stream an answer for prompt into response_placeholder.
+
+    Falls back to the buffered query endpoint if streaming fails before
+    any tokens arrive.
+
+    Returns:
+        Tuple of (answer, citations, completed) where completed is True
+        only if a full answer was received (safe to cache).
+    """
+    citations = []
+    full_response = ""
+    completed = False
+    last_paint = 0.0
+    # What the placeholder currently shows: a status message or "streaming".
+    # Status text is only painted on transitions, never over streamed tokens.
+    ui_state = None
+
+    try:
+        for event_type, data in query_documents_stream(
+            prompt, max_results=QUERY_MAX_RESULTS
+        ):
+            if event_type == "status":
+                status_msg = _status_message(data)
+                if status_msg and ui_state not in (status_msg, "streaming"):
+                    response_placeholder.markdown(status_msg)
+                    ui_state = status_msg
+
+            elif event_type == "citations":
+                citations = orjson.loads(data)
+
+            elif event_type == "token":
+                full_response += data
+                ui_state = "streaming"
+                now = time.monotonic()
+                if now - last_paint >= PAINT_INTERVAL:
+                    response_placeholder.markdown(full_response + "▌")
+                    last_paint = now
+
+            elif event_type == "done":
+                response_placeholder.markdown(full_response)
+                completed = True
+
+            elif event_type == "error":
+                error_info = orjson.loads(data)
+                full_response = f"Error: {error_info.get('message', 'Unknown error')}"
+                response_placeholder.error(full_response)
+
+    except Exception:
+        if full_response:
+            # Stream broke mid-answer: keep the streamed tokens
+            # rather than re-running the whole query buffered
+            response_placeholder.markdown(full_response)
+        else:
+            # Fallback to non-streaming query
+            response_placeholder.markdown("_Querying..._")
+            result = query_documents(prompt, max_results=QUERY_MAX_RESULTS)
+            if result:
+                full_response = result.get("answer", "No answer available.")
+                citations = result.get("citations", [])
+                response_placeholder.markdown(full_response)
+                completed = True
+            else:
+                full_response = "Failed to get a response. Please try again."
+                response_placeholder.error(full_response)
+
+    return full_response, citations, completed
+
+
+def _reset_document_selection() -> None:
+    """Clear the document table's row selection.
+
+    Selected rows are positions into the list, so they go stale whenever
+    documents are added or removed.
+    """
+    st.session_state.docs_table_version = (
+        st.session_state.get("docs_table_version", 0) + 1
+    )
+
+
+@st.fragment(run_every=UPLOAD_POLL_INTERVAL)
+def _poll_pending_uploads() -> None:
+    """Show processing progress for all pending uploads.
+
+    Runs as a fragment on a timer, so only the progress bars refresh and
+    the script never blocks while documents process. Each tick is one
+    short batch status request covering every pending upload. Triggers a
+    full rerun once any upload finishes so the document list picks it up.
+    """
+    pending = st.session_state.pending_documents
+    if not pending:
+        return
+
+    statuses = poll_statuses(list(pending))
+    if statuses is None:
+        # Backend unreachable this tick; try again on the next one
+        st.caption("Checking processing status...")
+        return
+
+    finished = False
+    for doc_id, filename in list(pending.items()):
+        status_info = statuses.get(doc_id)
+        if not status_info:
+            st.toast(f"Failed to get processing status for {filename}")
+            del pending[doc_id]
+            finished = True
+            continue
+
+        progress = status_info.get("progress", 0)
+        doc_status = status_info.get("status", "unknown")
+        message = status_info.get("message", "")
+
+        if doc_status == "completed":
+            st.toast(f"{filename} ready!")
+            del pending[doc_id]
+            finished = True
+        elif doc_status == "failed":
+            error = status_info.get("error", "Unknown error")
+            st.toast(f"Processing {filename} failed: {error}")
+            del pending[doc_id]
+            finished = True
+        else:
+            st.progress(
+                progress / 100, text=f"**{filename}** — {doc_status}: {message}"
+            )
+
+    if finished:
+        invalidate_document_cache()
+        # New documents shift the list's row positions
+        _reset_document_selection()
+        # Answers may change now that the document set has changed
+        st.session_state.query_cache.clear()
+        st.rerun()
+
+
+@st.fragment
+def _render_document_list() -> None:
+    """Render the user's document list with delete action.
+
+    Runs as a fragment so selecting rows does not rerun the whole page.
+    """
+    st.subheader("Your Documents")
+
+    docs = list_documents()
+    st.session_state.documents = docs
+
+    if not docs:
+        st.info("No documents uploaded yet. Upload a PDF or DOCX to get started.")
+        return
+
+    # Single dataframe widget instead of columns + button per document,
+    # so the widget count stays constant regardless of document count
+    docs_df = pd.DataFrame(
+        [
+            {
+                "id": doc["id"],
+                "filename": doc["filename"],
+                "chunks": doc.get("chunk_count", "?"),
+            }
+            for doc in docs
+        ]
+    )
+    # A keyed dataframe keeps its selected row positions when the data
+    # changes, so the key is versioned and bumped whenever rows move
+    table_key = f"docs_df_{st.session_state.get('docs_table_version', 0)}"
+    st.dataframe(
+        docs_df,
+        key=table_key,
+        on_select="rerun",
+        selection_mode="single-row",
+        hide_index=True,
+        width="stretch",
+        column_config={"id": None},
+    )
+
+    selected_rows = [
+        row
+        for row in st.session_state[table_key]["selection"]["rows"]
+        if row < len(docs)
+    ]
+    if st.button("Delete selected", disabled=not selected_rows):
+        selected_doc = docs[selected_rows[0]]
+        if delete_document(selected_doc["id"]):
+            _reset_document_selection()
+            st.session_state.query_cache.clear()
+            st.success("Deleted")
+            st.rerun()
+        else:
+            st.error("Delete failed")
+
+
+@st.fragment
+def _render_chat_history() -> None:
+    """Render past chat turns: recent messages always, older ones on request.
+
+    Runs as a fragment so the history toggles do not rerun the whole page.
+    A toggle (not an expander) hides older messages so they are not
+    rendered at all, and their Sources toggles are not rendered either.
+    """
+    messages = list(st.session_state.messages)
+    older_messages = messages[:-VISIBLE_CHAT_HISTORY]
+    if older_messages and st.toggle(
+        f"Show older messages ({len(older_messages)})", key="show_older_messages"
+    ):
+        for msg in older_messages:
+            render_chat_message(msg)
+    for msg in messages[-VISIBLE_CHAT_HISTORY:]:
+        render_chat_message(msg)
+
+
 st.title("RAG with Memory")
 
 # Show session info
@@ -44,67 +401,26 @@ with doc_tab:
 
     if uploaded_file is not None:
         if st.button("Upload", type="primary"):
-            file_bytes = uploaded_file.getvalue()
             content_type = uploaded_file.type or "application/pdf"
 
             with st.spinner("Uploading..."):
-                result = upload_document(file_bytes, uploaded_file.name, content_type)
+                result = upload_document(
+                    uploaded_file, uploaded_file.name, content_type
+                )
 
             if result:
-                doc_id = result["document_id"]
+                st.session_state.pending_documents[result["document_id"]] = result[
+                    "filename"
+                ]
                 st.success(f"Uploaded **{result['filename']}** — processing started")
 
-                # Poll for processing status
-                status_container = st.empty()
-                progress_bar = st.progress(0)
-                while True:
-                    status_info = get_document_status(doc_id)
-                    if not status_info:
-                        status_container.error("Failed to get processing status")
-                        break
-
-                    progress = status_info.get("progress", 0)
-                    doc_status = status_info.get("status", "unknown")
-                    message = status_info.get("message", "")
-
-                    progress_bar.progress(progress / 100)
-                    status_container.info(f"**{doc_status}**: {message}")
-
-                    if doc_status == "completed":
-                        status_container.success("Document ready!")
-                        progress_bar.progress(100)
-                        break
-                    elif doc_status == "failed":
-                        error = status_info.get("error", "Unknown error")
-                        status_container.error(f"Processing failed: {error}")
-                        break
-
-                    time.sleep(2)
-
-                st.rerun()
+    # Processing status polls in its own fragment (only while uploads pending)
+    if st.session_state.pending_documents:
+        _poll_pending_uploads()
 
     # Document list
     st.markdown("---")
-    st.subheader("Your Documents")
-
-    docs = list_documents()
-    st.session_state.documents = docs
-
-    if not docs:
-        st.info("No documents uploaded yet. Upload a PDF or DOCX to get started.")
-    else:
-        for doc in docs:
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                chunks = doc.get("chunk_count", "?")
-                st.markdown(f"**{doc['filename']}** ({chunks} chunks)")
-            with col2:
-                if st.button("Delete", key=f"del_{doc['id']}"):
-                    if delete_document(doc["id"]):
-                        st.success("Deleted")
-                        st.rerun()
-                    else:
-                        st.error("Delete failed")
+    _render_document_list()
 
 
 # =============================================================================
@@ -114,18 +430,7 @@ with chat_tab:
     if not st.session_state.documents and not list_documents():
         st.info("Upload a document first, then ask questions about it here.")
     else:
-        # Display chat history
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]):
-                st.markdown(msg["content"])
-                if msg.get("citations"):
-                    with st.expander("Sources"):
-                        for cit in msg["citations"]:
-                            score = cit.get("relevance_score", 0)
-                            st.caption(
-                                f"**{cit['filename']}** (relevance: {score:.0%})"
-                            )
-                            st.text(cit.get("chunk_text", ""))
+        _render_chat_history()
 
         # Chat input
         if prompt := st.chat_input("Ask a question about your documents..."):
@@ -134,68 +439,32 @@ with chat_tab:
             with st.chat_message("user"):
                 st.markdown(prompt)
 
-            # Generate response with streaming
+            # Generate response: replay a cached answer or stream a new one
             with st.chat_message("assistant"):
                 response_placeholder = st.empty()
-                citations = []
-                full_response = ""
-
-                try:
-                    for event_type, data in query_documents_stream(prompt):
-                        if event_type == "status":
-                            info = json.loads(data)
-                            stage = info.get("stage", "")
-                            if stage == "retrieving":
-                                response_placeholder.markdown(
-                                    "_Searching documents..._"
-                                )
-                            elif stage == "generating":
-                                response_placeholder.markdown("_Generating answer..._")
-
-                        elif event_type == "citations":
-                            citations = json.loads(data)
-
-                        elif event_type == "token":
-                            full_response += data
-                            response_placeholder.markdown(full_response + "▌")
-
-                        elif event_type == "done":
-                            response_placeholder.markdown(full_response)
-
-                        elif event_type == "error":
-                            error_info = json.loads(data)
-                            full_response = (
-                                f"Error: {error_info.get('message', 'Unknown error')}"
-                            )
-                            response_placeholder.error(full_response)
-
-                except Exception:
-                    # Fallback to non-streaming query
-                    response_placeholder.markdown("_Querying..._")
-                    result = query_documents(prompt)
-                    if result:
-                        full_response = result.get("answer", "No answer available.")
-                        citations = result.get("citations", [])
-                        response_placeholder.markdown(full_response)
-                    else:
-                        full_response = "Failed to get a response. Please try again."
-                        response_placeholder.error(full_response)
+                cache_key = _query_cache_key(prompt)
+                cached = _get_cached_answer(cache_key)
+                if cached:
+                    full_response, sources_md = cached
+                    response_placeholder.markdown(full_response)
+                else:
+                    full_response, citations, completed = _stream_answer(
+                        prompt, response_placeholder
+                    )
+                    sources_md = format_citations(citations)
+                    if completed:
+                        _cache_answer(cache_key, full_response, sources_md)
 
                 # Show citations
-                if citations:
-                    with st.expander("Sources"):
-                        for cit in citations:
-                            score = cit.get("relevance_score", 0)
-                            st.caption(
-                                f"**{cit['filename']}** (relevance: {score:.0%})"
-                            )
-                            st.text(cit.get("chunk_text", ""))
+                message_id = uuid.uuid4().hex
+                render_citations(sources_md, message_id)
 
                 # Save to history
                 st.session_state.messages.append(
                     {
+                        "id": message_id,
                         "role": "assistant",
                         "content": full_response,
-                        "citations": citations,
+                        "sources": sources_md,
                     }
                 )
@@ -1,6 +1,8 @@
 """API client wrapper using httpx Client (synchronous).
 
 Uses synchronous httpx.Client to avoid asyncio event loop conflicts with Streamlit.
+A single pooled client is shared via st.cache_resource so keep-alive connections
+are reused across calls instead of a new TCP/TLS handshake per request.
 Manages anonymous session cookies via st.session_state for per-user isolation.
 
 Backend endpoint contract:
@@ -10,16 +12,23 @@ Backend endpoint contract:
 - POST /api/v1/auth/refresh - JSON {refresh_token}, returns TokenPair
 - POST /api/v1/documents/upload - multipart file upload, returns DocumentUploadResponse
 - GET /api/v1/documents/ - list user documents, returns List[DocumentInfo]
-- GET /api/v1/documents/{id}/status - processing status, returns TaskStatusResponse
+- GET /api/v1/documents/status?ids=... - batch processing status, returns {id: TaskStatusResponse}
 - DELETE /api/v1/documents/{id} - delete document, returns MessageResponse
 - POST /api/v1/query/ - query documents, returns QueryResponse
 - POST /api/v1/query/stream - streaming query via SSE
 """
 
+import atexit
 import os
-from typing import Generator, List, Optional
+import random
+import re
+import threading
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import BinaryIO, Dict, Generator, List, Optional
 
 import httpx
+import orjson
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -28,6 +37,70 @@ load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# SSE framing: events end with a blank line; lines may end in CRLF, CR or LF
+_SSE_EVENT_BOUNDARY = re.compile(rb"\r\n\r\n|\r\r|\n\n")
+_SSE_LINE_SEPARATOR = re.compile("\r\n|\r|\n")
+
+# Retries for transient failures: connection attempts (any method) are
+# retried by the transport; GETs are also retried on read errors and 5xx
+CONNECT_RETRIES = 2
+REQUEST_ATTEMPTS = 3
+RETRY_STATUS_CODES = {502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD"}
+_TRANSIENT_ERRORS = (httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+# Streaming responses (SSE) only need a longer read timeout than REST calls
+STREAM_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=5.0)
+
+# Pool warm-up is best effort: give up quickly if the backend is slow
+WARMUP_TIMEOUT = httpx.Timeout(2.0, connect=1.0)
+
+
+@st.cache_resource
+def get_sync_client() -> httpx.Client:
+    """Return the pooled httpx.Client shared by all sessions.
+
+    The client's cookie jar rejects every cookie: the client is shared
+    across Streamlit sessions, so per-user session cookies are always
+    passed per request and never persisted on the client.
+    """
+    # Pool settings live on the transport, which also retries failed
+    # connection attempts (safe for any method: nothing was sent). HTTP/1.1
+    # only: httpx negotiates HTTP/2 solely over TLS and uvicorn serves 1.1.
+    transport = httpx.HTTPTransport(
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+        retries=CONNECT_RETRIES,
+    )
+    client = httpx.Client(
+        base_url=API_BASE_URL,
+        timeout=30.0,
+        transport=transport,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+    atexit.register(client.close)
+    return client
+
+
+def warm_connection_pool() -> None:
+    """Open a keep-alive connection to the backend ahead of the first query.
+
+    A cheap GET /health pays the TCP/TLS handshake off the critical path so
+    the first streamed answer reuses a pooled connection. Runs on a daemon
+    thread so an unreachable backend (and the transport's connect retries)
+    never delays the first paint. Best effort: any failure is ignored and
+    the real request simply connects as usual.
+    """
+    # Resolve the cached client on the script thread; the pool is thread-safe
+    client = get_sync_client()
+
+    def _warm() -> None:
+        try:
+            client.get("/health", timeout=WARMUP_TIMEOUT)
+        except httpx.HTTPError:
+            pass
+
+    threading.Thread(target=_warm, name="warm-connection-pool", daemon=True).start()
+
 
 def _get_headers() -> dict:
     """Build request headers with auth token or session cookie."""
@@ -47,9 +120,13 @@ def _get_cookies() -> dict:
 
 
 def _save_session_cookie(response: httpx.Response) -> None:
-    """Save anonymous session cookie from response to session state and URL."""
+    """Save anonymous session cookie from response to session state and URL.
+
+    Only writes when the session id actually changes, so routine calls do
+    not rewrite session state and query params on every response.
+    """
     session_id = response.cookies.get("session_id")
-    if session_id:
+    if session_id and session_id != st.session_state.get("anon_session_id"):
         st.session_state.anon_session_id = session_id
         # Persist in URL query params so it survives page refresh
         st.query_params["sid"] = session_id
@@ -58,19 +135,44 @@ def _save_session_cookie(response: httpx.Response) -> None:
 def _request(method: str, url: str, **kwargs) -> httpx.Response:
     """Make an HTTP request with auth headers and session cookies.
 
-    Automatically saves any session_id cookie from the response.
+    A json= body is serialized with orjson. Idempotent requests are retried
+    with jittered backoff on transient errors. Automatically saves any
+    session_id cookie from the response.
     """
     headers = _get_headers()
     headers.update(kwargs.pop("headers", {}))
     cookies = _get_cookies()
     cookies.update(kwargs.pop("cookies", {}))
 
-    with httpx.Client(base_url=API_BASE_URL, timeout=30.0) as client:
-        response = client.request(
-            method, url, headers=headers, cookies=cookies, **kwargs
-        )
-        _save_session_cookie(response)
-        return response
+    # Encode JSON bodies with orjson instead of httpx's stdlib json
+    payload = kwargs.pop("json", None)
+    if payload is not None:
+        kwargs["content"] = orjson.dumps(payload)
+        headers["Content-Type"] = "application/json"
+
+    # Only idempotent requests are retried on read-side failures or 5xx;
+    # connection failures are already retried by the transport
+    retryable = method.upper() in _IDEMPOTENT_METHODS
+    client = get_sync_client()
+    for attempt in range(REQUEST_ATTEMPTS):
+        last_attempt = attempt == REQUEST_ATTEMPTS - 1
+        try:
+            response = client.request(
+                method, url, headers=headers, cookies=cookies, **kwargs
+            )
+        except _TRANSIENT_ERRORS:
+            if not retryable or last_attempt:
+                raise
+        else:
+            if (
+                not retryable
+                or last_attempt
+                or response.status_code not in RETRY_STATUS_CODES
+            ):
+                _save_session_cookie(response)
+                return response
+        # Jittered exponential backoff: ~0.1s, ~0.2s, ...
+        time.sleep((2**attempt) * 0.1 + random.random() * 0.05)
 
 
 # =============================================================================
@@ -87,13 +189,14 @@ def login(email: str, password: str) -> Optional[dict]:
             "POST",
             "/api/v1/auth/login",
             data={"username": email, "password": password},
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except httpx.HTTPStatusError as e:
         try:
-            detail = e.response.json().get("detail", "Login failed")
+            detail = orjson.loads(e.response.content).get(
+                "detail", "Login failed"
+            )
         except Exception:
             detail = f"HTTP {e.response.status_code}"
         st.error(f"Login failed: {detail}")
@@ -112,10 +215,12 @@ def register(email: str, password: str) -> Optional[dict]:
             json={"email": email, "password": password},
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except httpx.HTTPStatusError as e:
         try:
-            detail = e.response.json().get("detail", "Registration failed")
+            detail = orjson.loads(e.response.content).get(
+                "detail", "Registration failed"
+            )
         except Exception:
             detail = f"HTTP {e.response.status_code}"
         st.error(f"Registration failed: {detail}")
@@ -131,10 +236,7 @@ def logout(access_token: str) -> bool:
         response = _request(
             "POST",
             "/api/v1/auth/logout",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-            },
+            headers={"Authorization": f"Bearer {access_token}"},
         )
         response.raise_for_status()
         return True
@@ -151,7 +253,7 @@ def refresh_tokens(refresh_token: str) -> Optional[dict]:
             json={"refresh_token": refresh_token},
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except (httpx.HTTPStatusError, httpx.RequestError):
         return None
 
@@ -161,20 +263,28 @@ def refresh_tokens(refresh_token: str) -> Optional[dict]:
 # =============================================================================
 
 def upload_document(
-    file_bytes: bytes, filename: str, content_type: str
+    file_obj: BinaryIO, filename: str, content_type: str
 ) -> Optional[dict]:
-    """Upload a document to the backend."""
+    """Upload a document to the backend.
+
+    Takes a file-like object (e.g. Streamlit's UploadedFile) so httpx
+    streams the multipart body in chunks instead of copying the whole
+    file into a bytes object first.
+    """
     try:
         response = _request(
             "POST",
             "/api/v1/documents/upload",
-            files={"file": (filename, file_bytes, content_type)},
+            files={"file": (filename, file_obj, content_type)},
         )
         response.raise_for_status()
-        return response.json()
+        invalidate_document_cache()
+        return orjson.loads(response.content)
     except httpx.HTTPStatusError as e:
         try:
-            detail = e.response.json().get("detail", "Upload failed")
+            detail = orjson.loads(e.response.content).get(
+                "detail", "Upload failed"
+            )
         except Exception:
             detail = f"HTTP {e.response.status_code}"
         st.error(f"Upload failed: {detail}")
@@ -184,22 +294,59 @@ def upload_document(
         return None
 
 
+@st.cache_data(ttl=5, show_spinner=False)
+def _list_documents_cached(cache_key: str) -> List[dict]:
+    """Fetch the document list, cached per user/session for a few seconds.
+
+    Streamlit reruns the whole script on every interaction; this collapses
+    those reruns into at most one backend call per TTL. Errors propagate
+    so failed lookups are not cached.
+
+    Args:
+        cache_key: Identifies the current user/session. Only used for
+            cache keying.
+    """
+    response = _request("GET", "/api/v1/documents/")
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def invalidate_document_cache() -> None:
+    """Drop cached document lists after documents are added or removed."""
+    _list_documents_cached.clear()
+
+
 def list_documents() -> List[dict]:
     """List user's documents."""
+    cache_key = "|".join(
+        (
+            st.session_state.get("access_token") or "",
+            st.session_state.get("anon_session_id") or "",
+        )
+    )
     try:
-        response = _request("GET", "/api/v1/documents/")
-        response.raise_for_status()
-        return response.json()
+        return _list_documents_cached(cache_key)
     except (httpx.HTTPStatusError, httpx.RequestError):
         return []
 
 
-def get_document_status(document_id: str) -> Optional[dict]:
-    """Get document processing status."""
+def poll_statuses(document_ids: List[str]) -> Optional[Dict[str, dict]]:
+    """Get processing status for several documents in a single request.
+
+    Documents not found (or not owned by the user) are absent from the
+    result. Returns None if the request itself failed, so callers can
+    retry on their next poll instead of treating every document as lost.
+    """
+    if not document_ids:
+        return {}
     try:
-        response = _request("GET", f"/api/v1/documents/{document_id}/status")
+        response = _request(
+            "GET",
+            "/api/v1/documents/status",
+            params={"ids": ",".join(document_ids)},
+        )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except (httpx.HTTPStatusError, httpx.RequestError):
         return None
 
@@ -209,6 +356,7 @@ def delete_document(document_id: str) -> bool:
     try:
         response = _request("DELETE", f"/api/v1/documents/{document_id}")
         response.raise_for_status()
+        invalidate_document_cache()
         return True
     except (httpx.HTTPStatusError, httpx.RequestError):
         return False
@@ -227,10 +375,12 @@ def query_documents(query: str, max_results: int = 3) -> Optional[dict]:
             json={"query": query, "max_results": max_results},
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except httpx.HTTPStatusError as e:
         try:
-            detail = e.response.json().get("detail", "Query failed")
+            detail = orjson.loads(e.response.content).get(
+                "detail", "Query failed"
+            )
         except Exception:
             detail = f"HTTP {e.response.status_code}"
         st.error(f"Query failed: {detail}")
@@ -240,6 +390,48 @@ def query_documents(query: str, max_results: int = 3) -> Optional[dict]:
         return None
 
 
+def _parse_sse_event(raw_event: bytes) -> Optional[tuple]:
+    """Parse one raw SSE event block into an (event_type, data) tuple.
+
+    Multiple data lines are joined with newlines per the SSE spec.
+    Returns None for blocks without data (e.g. keep-alive comments).
+    """
+    event_type = "message"
+    data_lines = []
+    for line in _SSE_LINE_SEPARATOR.split(raw_event.decode("utf-8")):
+        if line.startswith("event:"):
+            event_type = line[6:].strip()
+        elif line.startswith("data:"):
+            # SSE spec: "data:" followed by optional single space
+            # Remove only the spec space, preserve token whitespace
+            data = line[5:]
+            if data.startswith(" "):
+                data = data[1:]
+            data_lines.append(data)
+    if not data_lines:
+        return None
+    return (event_type, "\n".join(data_lines))
+
+
+def _iter_sse_events(response: httpx.Response) -> Generator:
+    """Parse an SSE response body into (event_type, data) tuples.
+
+    Frames events on blank-line boundaries in a byte buffer and decodes
+    each event once, rather than allocating a str per line.
+    """
+    buf = bytearray()
+    # No chunk_size: httpx would hold bytes back until the chunk fills up,
+    # delaying tokens. Yield chunks as they arrive from the network.
+    for chunk in response.iter_bytes():
+        buf += chunk
+        while match := _SSE_EVENT_BOUNDARY.search(buf):
+            raw_event = bytes(buf[: match.start()])
+            del buf[: match.end()]
+            event = _parse_sse_event(raw_event)
+            if event:
+                yield event
+
+
 def query_documents_stream(query: str, max_results: int = 3) -> Generator:
     """Stream query response via SSE.
 
@@ -248,26 +440,16 @@ def query_documents_stream(query: str, max_results: int = 3) -> Generator:
     """
     headers = _get_headers()
     headers["Accept"] = "text/event-stream"
+    headers["Content-Type"] = "application/json"
     cookies = _get_cookies()
 
-    with httpx.Client(base_url=API_BASE_URL, timeout=120.0) as client:
-        with client.stream(
-            "POST",
-            "/api/v1/query/stream",
-            json={"query": query, "max_results": max_results},
-            headers=headers,
-            cookies=cookies,
-        ) as response:
-            _save_session_cookie(response)
-            event_type = "message"
-            for line in response.iter_lines():
-                if line.startswith("event:"):
-                    event_type = line[6:].strip()
-                elif line.startswith("data:"):
-                    # SSE spec: "data:" followed by optional single space
-                    # Remove only the spec space, preserve token whitespace
-                    data = line[5:]
-                    if data.startswith(" "):
-                        data = data[1:]
-                    yield (event_type, data)
-                    event_type = "message"
+    with get_sync_client().stream(
+        "POST",
+        "/api/v1/query/stream",
+        content=orjson.dumps({"query": query, "max_results": max_results}),
+        headers=headers,
+        cookies=cookies,
+        timeout=STREAM_TIMEOUT,
+    ) as response:
+        _save_session_cookie(response)
+        yield from _iter_sse_events(response)
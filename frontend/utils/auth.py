@@ -6,7 +6,7 @@ to avoid infinite rerun loops (Pitfall #2 from research).
 
 Key patterns:
 - Read inputs from session_state keys (set by st.text_input)
-- Call API client functions (sync wrappers around async)
+- Call API client functions (synchronous, shared pooled httpx.Client)
 - Update session state on success/failure
 - NEVER call st.rerun() - let Streamlit handle reruns naturally
 """
@@ -45,7 +45,7 @@ def handle_login() -> None:
         st.session_state.login_error = "Email and password are required"
         return
 
-    # Call API (sync wrapper handles asyncio.run internally)
+    # Call API (synchronous, no per-call event loop)
     result = login(email, password)
 
     if result:
@@ -100,7 +100,7 @@ def handle_register() -> None:
         st.session_state.register_error = "Passwords do not match"
         return
 
-    # Call API (sync wrapper handles asyncio.run internally)
+    # Call API (synchronous, no per-call event loop)
     result = register(email, password)
 
     if result:
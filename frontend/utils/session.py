@@ -7,54 +7,104 @@ Provides utilities for managing authentication state in Streamlit:
 - Auth state cleanup on logout
 """
 
-from datetime import datetime, timezone
-from typing import Optional
-
-import jwt
+import base64
+import functools
+import operator
+import re
+import time
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Tuple
+
+import orjson
 import streamlit as st
 
+from utils.api_client import warm_connection_pool
 
-def init_session_state() -> None:
-    """Initialize all auth-related session state keys with defaults.
+# Maximum chat messages kept in session state; oldest are dropped first
+MAX_CHAT_HISTORY = 50
 
-    Should be called at the start of the app to ensure all keys exist.
-    Uses setdefault to avoid overwriting existing values on rerun.
-    """
-    # Authentication status
-    if "is_authenticated" not in st.session_state:
-        st.session_state.is_authenticated = False
+# Auth-related session state defaults (immutable values)
+_AUTH_DEFAULTS = (
+    ("is_authenticated", False),
+    ("access_token", None),
+    ("refresh_token", None),
+    # Decoded user info from JWT
+    ("user_info", None),
+    # Session type: "anonymous" or "authenticated"
+    ("session_type", "anonymous"),
+)
+
+# Per-session containers, built fresh for each new session
+_SESSION_FACTORIES = (
+    # Chat message history (bounded so reruns re-render at most this many)
+    ("messages", lambda: deque(maxlen=MAX_CHAT_HISTORY)),
+    # Completed chat answers for repeated questions: {key: (answer, sources_md)}
+    ("query_cache", OrderedDict),
+    # Cached document list
+    ("documents", list),
+    # Uploads still being processed: {document_id: filename}
+    ("pending_documents", dict),
+)
+
+# get_user_info result for anonymous visitors; shared and read-only, so
+# callers must not (and cannot) mutate it
+_ANONYMOUS_INFO: Mapping = MappingProxyType(
+    {
+        "email": "Anonymous",
+        "user_id": "N/A",
+        "role": "anonymous",
+        "session_type": "anonymous",
+    }
+)
 
-    # JWT tokens
-    if "access_token" not in st.session_state:
-        st.session_state.access_token = None
+# (sub, user_id, role) claims, fetched in one call
+_get_user_fields = operator.itemgetter("sub", "user_id", "role")
 
-    if "refresh_token" not in st.session_state:
-        st.session_state.refresh_token = None
+# utils.auth.handle_logout, resolved on first sidebar render
+_handle_logout: Optional[Callable[[], None]] = None
 
-    # Decoded user info from JWT
-    if "user_info" not in st.session_state:
-        st.session_state.user_info = None
+# Returned by decode_token_claims for invalid tokens; read-only so the
+# shared instance cannot be mutated by a caller
+_EMPTY_CLAIMS: Mapping = MappingProxyType({})
 
-    # Session type: "anonymous" or "authenticated"
-    if "session_type" not in st.session_state:
-        st.session_state.session_type = "anonymous"
+# Tokens are treated as expired this long before their exp claim, so a
+# request is never sent with a token about to lapse (or skewed clocks)
+TOKEN_EXPIRY_BUFFER_SECONDS = 300
 
-    # Chat message history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+# exp claim inside a decoded JWT payload, read without a JSON parser
+_EXP_RE = re.compile(rb'"exp"\s*:\s*(\d+)')
 
-    # Cached document list
-    if "documents" not in st.session_state:
-        st.session_state.documents = []
+
+def init_session_state() -> None:
+    """Initialize all auth-related session state keys with defaults.
+
+    Should be called at the start of the app to ensure all keys exist.
+    Uses setdefault to avoid overwriting existing values; once a session
+    is initialized, later reruns return after a single flag lookup.
+    """
+    ss = st.session_state
+    if ss.get("_session_inited"):
+        return
+
+    for key, value in _AUTH_DEFAULTS:
+        ss.setdefault(key, value)
+    for key, factory in _SESSION_FACTORIES:
+        if key not in ss:
+            ss[key] = factory()
 
     # Anonymous session ID (persisted from backend cookie)
     # Restore from URL query params if available (survives page refresh)
-    if "anon_session_id" not in st.session_state:
-        saved_sid = st.query_params.get("sid")
-        st.session_state.anon_session_id = saved_sid
+    if "anon_session_id" not in ss:
+        ss.anon_session_id = st.query_params.get("sid")
+
+    # Warm the shared connection pool once per session (non-blocking)
+    warm_connection_pool()
 
+    ss._session_inited = True
 
-def get_user_info() -> dict:
+
+def get_user_info() -> Mapping:
     """Return user details from session state.
 
     Extracts info from stored JWT claims or returns anonymous defaults.
@@ -63,24 +113,47 @@ def get_user_info() -> dict:
         Dict with email, user_id, role, session_type.
     """
     if st.session_state.get("is_authenticated") and st.session_state.get("user_info"):
-        user_info = st.session_state.user_info
-        return {
-            "email": user_info.get("sub", "Unknown"),
-            "user_id": user_info.get("user_id", "N/A"),
-            "role": user_info.get("role", "user"),
-            "session_type": "authenticated",
-        }
+        return _build_user_info(*_user_fields(st.session_state.user_info))
 
     # Anonymous user defaults
-    return {
-        "email": "Anonymous",
-        "user_id": "N/A",
-        "role": "anonymous",
-        "session_type": "anonymous",
-    }
+    return _ANONYMOUS_INFO
+
+
+def _user_fields(user_info: Mapping) -> Tuple[str, str, str]:
+    """Return (email, user_id, role) from decoded token claims.
+
+    Backend access tokens always carry all three claims, so the common
+    case is a single itemgetter call; the per-key defaults only apply to
+    tokens missing one of them.
+    """
+    try:
+        return _get_user_fields(user_info)
+    except KeyError:
+        return (
+            user_info.get("sub", "Unknown"),
+            user_info.get("user_id", "N/A"),
+            user_info.get("role", "user"),
+        )
+
 
+@functools.lru_cache(maxsize=256)
+def _build_user_info(email: str, user_id: str, role: str) -> Mapping:
+    """Build the authenticated user info once per distinct identity.
 
-def decode_token_claims(token: str) -> Optional[dict]:
+    The cache is process-wide, so the result is shared across sessions
+    and returned read-only, like _ANONYMOUS_INFO.
+    """
+    return MappingProxyType(
+        {
+            "email": email,
+            "user_id": user_id,
+            "role": role,
+            "session_type": "authenticated",
+        }
+    )
+
+
+def decode_token_claims(token: str) -> Mapping:
     """Decode JWT token to extract claims without signature verification.
 
     This is safe because we're just reading the claims, not validating.
@@ -90,20 +163,88 @@ def decode_token_claims(token: str) -> Optional[dict]:
         token: JWT token string.
 
     Returns:
-        Dict of token claims, or None if token is invalid.
+        Dict of token claims, or the shared empty _EMPTY_CLAIMS mapping if
+        the token is invalid (test with ``is _EMPTY_CLAIMS``).
+    """
+    if not _is_jwt_shaped(token):
+        return _EMPTY_CLAIMS
+
+    claims = _cached_decode(token)
+    return dict(claims) if claims is not None else _EMPTY_CLAIMS
+
+
+def _is_jwt_shaped(token: Optional[str]) -> bool:
+    """Cheap pre-check: a non-empty string with three dot-separated segments.
+
+    Lets empty or garbage tokens short-circuit before any decoding (and
+    before they can occupy decode cache slots).
+    """
+    return isinstance(token, str) and token.count(".") == 2
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_decode(token: str) -> Optional[MappingProxyType]:
+    """Decode a JWT payload once per distinct token.
+
+    Reruns decode the same access token over and over, so results are
+    memoized by raw token string. Claims are returned read-only so callers
+    cannot mutate the cached entry; invalid tokens cache None.
     """
     try:
-        return jwt.decode(token, options={"verify_signature": False})
-    except jwt.DecodeError:
+        claims = orjson.loads(_decode_payload_segment(token))
+    except ValueError:
         return None
-    except Exception:
+    return MappingProxyType(claims) if isinstance(claims, dict) else None
+
+
+def _decode_payload_segment(token: str) -> bytes:
+    """Base64url-decode the payload (middle) segment of a JWT.
+
+    Claims are only read here, never verified, so the header and
+    signature segments are ignored.
+
+    Raises:
+        ValueError: If the token has no payload segment or it is not
+            valid base64url.
+    """
+    try:
+        payload_b64 = token.split(".", 2)[1]
+    except IndexError:
+        raise ValueError("Token has no payload segment") from None
+    padding = "=" * (-len(payload_b64) % 4)
+    return base64.urlsafe_b64decode(payload_b64 + padding)
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_exp(token: str) -> Optional[int]:
+    """Pull the exp claim out of a JWT without a full decode.
+
+    Only the payload segment is base64url-decoded and the integer is read
+    with a regex, skipping the header and the JSON parser. Memoized like
+    _cached_decode, so a bad token fails (and returns None) once rather
+    than on every rerun.
+
+    Returns:
+        The exp timestamp, or None if the token is malformed or has no exp.
+    """
+    try:
+        payload = _decode_payload_segment(token)
+    except ValueError:
         return None
 
+    match = _EXP_RE.search(payload)
+    return int(match.group(1)) if match else None
+
 
 def is_token_expired(token: str) -> bool:
     """Check if JWT token is expired without signature verification.
 
-    Decodes the token and compares exp claim to current UTC time.
+    The session's access token uses the expiry captured by set_auth_state;
+    for other tokens only the exp claim is extracted. Both compare plain
+    UNIX timestamps.
+
+    Tokens within TOKEN_EXPIRY_BUFFER_SECONDS of their exp count as
+    expired.
 
     Args:
         token: JWT token string.
@@ -111,23 +252,20 @@ def is_token_expired(token: str) -> bool:
     Returns:
         True if token is expired or invalid, False if still valid.
     """
-    if not token:
+    if not _is_jwt_shaped(token):
         return True
 
-    try:
-        payload = jwt.decode(token, options={"verify_signature": False})
-        exp = payload.get("exp")
-        if not exp:
-            return True
-
-        # Compare expiry to current UTC time
-        exp_datetime = datetime.fromtimestamp(exp, tz=timezone.utc)
-        return exp_datetime < datetime.now(timezone.utc)
-    except jwt.DecodeError:
-        return True
-    except Exception:
+    # The session's own access token: effective expiry was set at login
+    if token == st.session_state.get("access_token"):
+        return time.time() >= st.session_state.get("_effective_exp", 0.0)
+
+    exp = _extract_exp(token)
+    if not exp:
         return True
 
+    # Compare expiry (minus the safety buffer) to current UNIX time
+    return time.time() >= exp - TOKEN_EXPIRY_BUFFER_SECONDS
+
 
 def get_token_expiry_seconds(token: str) -> int:
     """Return seconds until token expiry.
@@ -138,36 +276,28 @@ def get_token_expiry_seconds(token: str) -> int:
     Returns:
         Seconds until expiry (positive), or 0 if expired/invalid.
     """
-    if not token:
+    if not _is_jwt_shaped(token):
         return 0
 
-    try:
-        payload = jwt.decode(token, options={"verify_signature": False})
-        exp = payload.get("exp")
-        if not exp:
-            return 0
+    # The session's own access token: expiry was captured at login
+    if token == st.session_state.get("access_token"):
+        exp_ts = st.session_state.get("_access_exp_ts", 0.0)
+        return max(0, int(exp_ts - time.time()))
 
-        exp_datetime = datetime.fromtimestamp(exp, tz=timezone.utc)
-        remaining = exp_datetime - datetime.now(timezone.utc)
-
-        # Return seconds, minimum 0
-        return max(0, int(remaining.total_seconds()))
-    except jwt.DecodeError:
-        return 0
-    except Exception:
+    exp = _extract_exp(token)
+    if not exp:
         return 0
 
+    # Return seconds, minimum 0
+    return max(0, int(exp - time.time()))
+
 
 def clear_auth_state() -> None:
     """Reset all auth-related session state keys to defaults.
 
     Called on logout or when session becomes invalid.
     """
-    st.session_state.is_authenticated = False
-    st.session_state.access_token = None
-    st.session_state.refresh_token = None
-    st.session_state.user_info = None
-    st.session_state.session_type = "anonymous"
+    st.session_state.update(_AUTH_DEFAULTS, _access_exp_ts=0.0, _effective_exp=0.0)
 
 
 def set_auth_state(access_token: str, refresh_token: str) -> None:
@@ -183,12 +313,18 @@ def set_auth_state(access_token: str, refresh_token: str) -> None:
     # Decode token to get user info
     user_info = decode_token_claims(access_token)
 
-    if user_info:
-        st.session_state.is_authenticated = True
-        st.session_state.access_token = access_token
-        st.session_state.refresh_token = refresh_token
-        st.session_state.user_info = user_info
-        st.session_state.session_type = "authenticated"
+    if user_info is not _EMPTY_CLAIMS:
+        # Decoded once here so expiry checks are a timestamp compare
+        exp_ts = float(user_info.get("exp") or 0)
+        st.session_state.update(
+            is_authenticated=True,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            user_info=user_info,
+            session_type="authenticated",
+            _access_exp_ts=exp_ts,
+            _effective_exp=exp_ts - TOKEN_EXPIRY_BUFFER_SECONDS,
+        )
     else:
         # Token decode failed, clear state
         clear_auth_state()
@@ -201,26 +337,27 @@ def render_user_info() -> None:
     - Authenticated: email, role, session type, logout button
     - Anonymous: anonymous session info, login hint
 
-    Must be called after init_session_state() and imports handle_logout
-    dynamically to avoid circular imports.
+    Must be called after init_session_state(). handle_logout is imported
+    on first use to avoid circular imports.
     """
-    # Import handle_logout here to avoid circular import
-    # (auth.py imports from session.py)
-    from utils.auth import handle_logout
+    global _handle_logout
 
     with st.sidebar:
         st.markdown("### User Info")
 
         if st.session_state.get("is_authenticated"):
-            user_info = st.session_state.get("user_info", {})
-            email = user_info.get("sub", "Unknown")
-            role = user_info.get("role", "user")
+            email, _, role = _user_fields(st.session_state.get("user_info", {}))
 
             st.markdown(f"**Email:** {email}")
             st.markdown(f"**Role:** {role}")
             st.markdown("**Session:** Authenticated")
 
-            st.button("Logout", on_click=handle_logout, key="sidebar_logout")
+            if _handle_logout is None:
+                # Resolved once here to avoid circular import
+                # (auth.py imports from session.py)
+                from utils.auth import handle_logout as _handle_logout
+
+            st.button("Logout", on_click=_handle_logout, key="sidebar_logout")
         else:
             st.markdown("**Session:** Anonymous")
             st.caption("Login to save your data permanently")